@@ -63,6 +63,7 @@ class LightEvalLoggingArgs:
     public_run: bool = False
     results_org: str | None = None
     tensorboard_metric_prefix: str = "eval"
+    push_in_background: bool = False
 
 
 @dataclass
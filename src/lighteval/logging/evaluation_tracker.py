@@ -20,22 +20,35 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import atexit
 import copy
 import json
 import os
 import re
+import threading
 import time
-from dataclasses import asdict, is_dataclass
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, fields, is_dataclass
 from datetime import datetime
-from enum import Enum
+from functools import lru_cache
 from io import BytesIO
 from pathlib import Path
 
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
 import torch
-from datasets import Dataset, load_dataset
 from datasets.utils.metadata import MetadataConfigs
 from fsspec import url_to_fs
-from huggingface_hub import DatasetCard, DatasetCardData, HfApi, HFSummaryWriter, hf_hub_url
+from huggingface_hub import (
+    CommitOperationAdd,
+    DatasetCard,
+    DatasetCardData,
+    HfApi,
+    HFSummaryWriter,
+    hf_hub_url,
+)
 
 from lighteval.logging.hierarchical_logger import hlog, hlog_warn
 from lighteval.logging.info_loggers import (
@@ -53,25 +66,140 @@ if is_nanotron_available():
     from nanotron.config import GeneralArgs  # type: ignore
 
 
-class EnhancedJSONEncoder(json.JSONEncoder):
+@lru_cache(maxsize=None)
+def _field_names(cls) -> tuple[str, ...]:
+    """Field names of a dataclass type, computed once per type instead of once per instance."""
+    return tuple(f.name for f in fields(cls))
+
+
+@lru_cache(maxsize=None)
+def _details_column_names(cls) -> tuple[str, ...]:
+    """Columns of the details tables for a details dataclass type."""
+    # We don't keep 'id' around if it's there, and sort column names to make it easier later
+    names = set(_field_names(cls))
+    names.discard("id")
+    return tuple(sorted(names))
+
+
+def _dataclass_to_dict(o) -> dict:
+    """Shallow equivalent of `asdict`: nested values are left to the json encoder instead of being deep-copied."""
+    return {name: getattr(o, name) for name in _field_names(type(o))}
+
+
+def _encode_default(o):
     """
-    Provides a proper json encoding for the loggers and trackers json dumps.
-    Notably manages the json encoding of dataclasses.
+    Provides a proper json encoding for the objects orjson does not natively
+    handle in the loggers and trackers json dumps.
+
+    Dataclasses are passed through to this hook, so that nested ones keep all
+    their fields, as with `asdict`. Note that orjson natively serializes enums
+    by value, and NaN floats as `null`.
     """
+    if is_dataclass(o) and not isinstance(o, type):
+        return _dataclass_to_dict(o)
+    if callable(o):
+        return o.__name__
+    if isinstance(o, torch.dtype):
+        return str(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+_NON_SPLIT_CHARS_RE = re.compile(r"[^\w\.]")
+_NON_CONFIG_CHARS_RE = re.compile(r"\W")
+
+
+# The same task names and dates come back for every file of every run when rebuilding the details card
+@lru_cache(maxsize=4096)
+def _sanitize_split_name(name: str) -> str:
+    return _NON_SPLIT_CHARS_RE.sub("_", name)
+
+
+@lru_cache(maxsize=4096)
+def _sanitize_config_name(name: str) -> str:
+    return _NON_CONFIG_CHARS_RE.sub("_", name)
+
+
+def _dumps(obj) -> bytes:
+    return orjson.dumps(
+        obj,
+        default=_encode_default,
+        option=orjson.OPT_INDENT_2
+        | orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_SERIALIZE_NUMPY
+        | orjson.OPT_PASSTHROUGH_DATACLASS,
+    )
+
+
+# Successive tensorboard pushes often log the same results, so we don't rebuild their markdown table every time
+_RESULTS_MARKDOWN_CACHE: dict[str, str] = {}
+_RESULTS_MARKDOWN_CACHE_SIZE = 64
+# The cache is shared by the background upload workers of all trackers
+_RESULTS_MARKDOWN_CACHE_LOCK = threading.Lock()
+
+
+def _results_to_markdown(results: dict) -> str:
+    try:
+        # Unlike orjson, the json module keeps NaN and infinities apart, so each key renders a single table
+        results_key = json.dumps(results)
+    except TypeError:
+        # Results that can't be serialized are not cached
+        return obj_to_markdown(results)
+    with _RESULTS_MARKDOWN_CACHE_LOCK:
+        if results_key in _RESULTS_MARKDOWN_CACHE:
+            return _RESULTS_MARKDOWN_CACHE[results_key]
+    # The table is built from the original object, so its rendering is unchanged
+    results_markdown = obj_to_markdown(results)
+    with _RESULTS_MARKDOWN_CACHE_LOCK:
+        if len(_RESULTS_MARKDOWN_CACHE) >= _RESULTS_MARKDOWN_CACHE_SIZE:
+            # Evicts the oldest entry
+            del _RESULTS_MARKDOWN_CACHE[next(iter(_RESULTS_MARKDOWN_CACHE))]
+        _RESULTS_MARKDOWN_CACHE[results_key] = results_markdown
+    return results_markdown
+
+
+def _parquet_bytes(table: pa.Table) -> bytes:
+    buffer = BytesIO()
+    pq.write_table(table, buffer, compression="zstd")
+    return buffer.getvalue()
+
+
+def _parquet_bytes_by_task(tables: dict[str, pa.Table]) -> dict[str, bytes]:
+    # Parquet encoding releases the GIL, so tasks are encoded concurrently
+    with ThreadPoolExecutor(max_workers=min(32, os.cpu_count() or 1)) as executor:
+        return dict(zip(tables, executor.map(_parquet_bytes, tables.values())))
+
+
+def _results_parquet_bytes(results_json: bytes) -> bytes:
+    """Parquet version of the results, with one json encoded column per results section."""
+    results = orjson.loads(results_json)
+    columns = {key: [orjson.dumps(v, option=orjson.OPT_INDENT_2).decode("utf-8")] for key, v in results.items()}
+    return _parquet_bytes(pa.Table.from_pydict(columns))
+
+
+# Buffer size of the output files. Remote filesystems (s3fs, gcsfs, ...) upload a file in parts of this size,
+# so our outputs usually go in a single request. Local files ignore it, but are written with a single `write` call.
+WRITE_BLOCK_SIZE = 8 * 1024 * 1024
+
+# Date ids are iso dates, always with microseconds, in which the `:` are replaced by `-`,
+# as windows does not allow `:` in filenames
+DATE_ID_FORMAT = "%Y-%m-%dT%H-%M-%S.%f"
+RESULTS_FILE_REGEX = re.compile(r"^results_(?P<date>\d+-\d+-\d+T.*)\.parquet$")
+DETAILS_PATH_REGEX = re.compile(
+    r"^(?P<dir>\d{4}-\d{2}-\d{2}T\d{2}-\d{2}-\d{2}(?:\.\d+)?)/details_(?P<task_name>.*?)_\d+-\d+-\d+T.*\.parquet$"
+)
+
+
+def _parse_date_id(date_id: str) -> datetime:
+    # isoformat drops the microseconds when they are 0
+    date_format = DATE_ID_FORMAT if "." in date_id else DATE_ID_FORMAT.removesuffix(".%f")
+    return datetime.strptime(date_id, date_format)
+
 
-    def default(self, o):
-        if is_dataclass(o):
-            try:
-                return asdict(o)  # type: ignore
-            except Exception:
-                return str(o)
-        if callable(o):
-            return o.__name__
-        if isinstance(o, torch.dtype):
-            return str(o)
-        if isinstance(o, Enum):
-            return o.name
-        return super().default(o)
+# Tasks for which we add another config with all the subtasks splits together
+SPECIAL_TASKS = [
+    "lighteval|mmlu",
+    "original|mmlu",
+]
 
 
 class EvaluationTracker:
@@ -97,6 +225,7 @@ class EvaluationTracker:
         tensorboard_metric_prefix: str = "eval",
         public: bool = False,
         nanotron_run_info: "GeneralArgs" = None,
+        push_in_background: bool = False,
     ) -> None:
         """
         Creates all the necessary loggers for evaluation tracking.
@@ -114,6 +243,9 @@ class EvaluationTracker:
             tensorboard_metric_prefix (str): Prefix for the metrics in the tensorboard logs
             public (bool): If True, results and details are pushed in private orgs
             nanotron_run_info (GeneralArgs): Reference to informations about Nanotron models runs
+            push_in_background (bool): If True, pushes to the hub and to tensorboard are done in a background thread,
+                so that `save` returns as soon as the local files are written. Pending pushes are waited for with
+                [`EvaluationTracker.wait_for_uploads`] or [`EvaluationTracker.close`], which is also called at exit.
         """
         self.details_logger = DetailsLogger()
         self.metrics_logger = MetricsLogger()
@@ -140,14 +272,19 @@ class EvaluationTracker:
 
         self.public = public
 
+        # A single worker keeps successive pushes (and metadata card updates) in order
+        self._upload_executor = ThreadPoolExecutor(max_workers=1) if push_in_background else None
+        self._upload_futures: list[Future] = []
+        if self._upload_executor is not None:
+            atexit.register(self.close)
+
     def save(self) -> None:
         """Saves the experiment information and results to files, and to the hub if requested."""
         hlog("Saving experiment tracker")
-        date_id = datetime.now().isoformat().replace(":", "-")
+        date_id = datetime.now().strftime(DATE_ID_FORMAT)
 
         # We first prepare data to save
-        config_general = copy.deepcopy(self.general_config_logger)
-        config_general = asdict(config_general)
+        config_general = _dataclass_to_dict(self.general_config_logger)
         # We remove the config from logging, which contains context/accelerator objects
         config_general.pop("config")
 
@@ -157,59 +294,109 @@ class EvaluationTracker:
             "versions": self.versions_logger.versions,
             "config_tasks": self.task_config_logger.tasks_configs,
             "summary_tasks": self.details_logger.compiled_details,
-            "summary_general": asdict(self.details_logger.compiled_details_over_all_tasks),
+            "summary_general": self.details_logger.compiled_details_over_all_tasks,
         }
+        # Encoded once, then shared by the local save and the hub upload
+        results_json = _dumps(results_dict)
 
-        # Create the details datasets for later upload
-        details_datasets: dict[str, Dataset] = {}
+        # Create the details tables for later upload
+        details_tables: dict[str, pa.Table] = {}
         for task_name, task_details in self.details_logger.details.items():
-            # Create a dataset from the dictionary - we force cast to str to avoid formatting problems for nested objects
-            dataset = Dataset.from_list([{k: str(v) for k, v in asdict(detail).items()} for detail in task_details])
-
-            # We don't keep 'id' around if it's there
-            column_names = dataset.column_names
-            if "id" in dataset.column_names:
-                column_names = [t for t in dataset.column_names if t != "id"]
-
-            # Sort column names to make it easier later
-            dataset = dataset.select_columns(sorted(column_names))
-            details_datasets[task_name] = dataset
+            # Tasks without any logged sample give an empty table, as they did with `Dataset.from_list([])`
+            column_names = _details_column_names(type(task_details[0])) if task_details else ()
+            # Columns are built in one pass - we force cast to str to avoid formatting problems for nested objects
+            details_tables[task_name] = pa.Table.from_pydict(
+                {name: [str(getattr(detail, name)) for detail in task_details] for name in column_names}
+            )
+        # Encoded once as parquet files, then shared by the local save and the hub upload
+        details_datasets = _parquet_bytes_by_task(details_tables)
 
         # We save results at every case
-        self.save_results(date_id, results_dict)
+        self.save_results(date_id, results_json)
 
         if self.should_save_details:
             self.save_details(date_id, details_datasets)
 
+        # Background pushes only get snapshots of the loggers content, as the loggers keep being used meanwhile
         if self.should_push_to_hub:
-            self.push_to_hub(
+            self._run_upload(
+                self.push_to_hub,
+                repo_id=self._details_repo_id(),
+                model_name=self.general_config_logger.model_name,
                 date_id=date_id,
                 details=details_datasets,
-                results_dict=results_dict,
+                results_json=results_json,
+                results_parquet=_results_parquet_bytes(results_json),
             )
 
         if self.should_push_results_to_tensorboard:
-            self.push_to_tensorboard(
-                results=self.metrics_logger.metric_aggregated, details=self.details_logger.compiled_details
+            results = self.metrics_logger.metric_aggregated
+            details = self.details_logger.compiled_details
+            if self._upload_executor is not None:
+                results, details = copy.deepcopy(results), copy.deepcopy(details)
+            # The nanotron run info is a live reference, so the step is read when saving, not when pushing
+            if self.nanotron_run_info is not None:
+                global_step = self.nanotron_run_info.step
+                run = f"{self.nanotron_run_info.run}_{self.tensorboard_metric_prefix}"
+            else:
+                global_step = 0
+                run = self.tensorboard_metric_prefix
+            self._run_upload(
+                self.push_to_tensorboard, results=results, details=details, global_step=global_step, run=run
             )
 
-    def save_results(self, date_id: str, results_dict: dict):
+    def _run_upload(self, upload_fn, **kwargs) -> None:
+        """Runs an upload to the hub, in the background if the tracker was created with `push_in_background`."""
+        if self._upload_executor is None:
+            upload_fn(**kwargs)
+        else:
+            self._upload_futures.append(self._upload_executor.submit(upload_fn, **kwargs))
+
+    def wait_for_uploads(self) -> None:
+        """Blocks until all the background uploads are done, and raises the first error encountered."""
+        futures, self._upload_futures = self._upload_futures, []
+        for future in futures:
+            future.result()
+
+    def close(self) -> None:
+        """Waits for the background uploads, then stops the upload worker. Later saves push synchronously."""
+        if self._upload_executor is None:
+            return
+        atexit.unregister(self.close)
+        try:
+            self.wait_for_uploads()
+        finally:
+            self._upload_executor.shutdown(wait=True)
+            self._upload_executor = None
+
+    def save_results(self, date_id: str, results_json: bytes):
         output_dir_results = Path(self.output_dir) / "results" / self.general_config_logger.model_name
         self.fs.mkdirs(output_dir_results, exist_ok=True)
         output_results_file = output_dir_results / f"results_{date_id}.json"
         hlog(f"Saving results to {output_results_file}")
-        with self.fs.open(output_results_file, "w") as f:
-            f.write(json.dumps(results_dict, cls=EnhancedJSONEncoder, indent=2, ensure_ascii=False))
+        with self.fs.open(output_results_file, "wb", block_size=WRITE_BLOCK_SIZE) as f:
+            f.write(results_json)
 
-    def save_details(self, date_id: str, details_datasets: dict[str, Dataset]):
+    def save_details(self, date_id: str, details_datasets: dict[str, bytes]):
         output_dir_details = Path(self.output_dir) / "details" / self.general_config_logger.model_name
         output_dir_details_sub_folder = output_dir_details / date_id
         self.fs.mkdirs(output_dir_details_sub_folder, exist_ok=True)
         hlog(f"Saving details to {output_dir_details_sub_folder}")
-        for task_name, dataset in details_datasets.items():
+
+        def _write_task(task_name: str, details_parquet: bytes):
             output_file_details = output_dir_details_sub_folder / f"details_{task_name}_{date_id}.parquet"
-            with self.fs.open(str(output_file_details), "wb") as f:
-                dataset.to_parquet(f)
+            # The already encoded parquet file is written with a single call
+            with self.fs.open(str(output_file_details), "wb", block_size=WRITE_BLOCK_SIZE) as f:
+                f.write(details_parquet)
+
+        # File writes release the GIL, so tasks are written concurrently
+        with ThreadPoolExecutor(max_workers=min(32, os.cpu_count() or 1)) as executor:
+            futures = [
+                executor.submit(_write_task, task_name, details_parquet)
+                for task_name, details_parquet in details_datasets.items()
+            ]
+            for future in futures:
+                future.result()
 
     def generate_final_dict(self) -> dict:
         """Aggregates and returns all the logger's experiment information in a dictionary.
@@ -222,7 +409,7 @@ class EvaluationTracker:
             "versions": self.versions_logger.versions,
             "config_tasks": self.task_config_logger.tasks_configs,
             "summary_tasks": self.details_logger.compiled_details,
-            "summary_general": asdict(self.details_logger.compiled_details_over_all_tasks),
+            "summary_general": _dataclass_to_dict(self.details_logger.compiled_details_over_all_tasks),
         }
 
         final_dict = {
@@ -232,156 +419,147 @@ class EvaluationTracker:
 
         return final_dict
 
-    def push_to_hub(
-        self,
-        date_id: str,
-        details: dict[str, Dataset],
-        results_dict: dict,
-    ) -> None:
-        """Pushes the experiment details (all the model predictions for every step) to the hub."""
+    def _details_repo_id(self) -> str:
         sanitized_model_name = self.general_config_logger.model_name.replace("/", "__")
 
         # "Default" detail names are the public detail names (same as results vs private-results)
         repo_id = f"{self.hub_results_org}/details_{sanitized_model_name}"
         if not self.public:  # if not public, we add `_private`
             repo_id = f"{repo_id}_private"
+        return repo_id
 
-        fsspec_repo_uri = f"hf://datasets/{repo_id}"
-
+    def push_to_hub(
+        self,
+        repo_id: str,
+        model_name: str,
+        date_id: str,
+        details: dict[str, bytes],
+        results_json: bytes,
+        results_parquet: bytes,
+    ) -> None:
+        """Pushes the experiment details (all the model predictions for every step) to the hub."""
         if not self.api.repo_exists(repo_id):
             self.api.create_repo(repo_id, private=not (self.public), repo_type="dataset", exist_ok=True)
             hlog(f"Repository {repo_id} not found, creating it.")
 
-        # We upload it both as a json and a parquet file
+        # We upload results both as a json and a parquet file
         result_file_base_name = f"results_{date_id}"
-        results_json = json.dumps(results_dict, cls=EnhancedJSONEncoder, indent=2, ensure_ascii=False)
-        self.api.upload_file(
+        operations = [
+            CommitOperationAdd(path_in_repo=f"{result_file_base_name}.json", path_or_fileobj=results_json),
+            CommitOperationAdd(path_in_repo=f"{result_file_base_name}.parquet", path_or_fileobj=results_parquet),
+        ]
+        for task_name, details_parquet in details.items():
+            operations.append(
+                CommitOperationAdd(
+                    path_in_repo=f"{date_id}/details_{task_name}_{date_id}.parquet", path_or_fileobj=details_parquet
+                )
+            )
+
+        # Everything goes in a single commit, the files themselves being uploaded in parallel
+        self.api.create_commit(
             repo_id=repo_id,
-            path_or_fileobj=BytesIO(results_json.encode("utf-8")),
-            path_in_repo=f"{result_file_base_name}.json",
             repo_type="dataset",
+            operations=operations,
+            commit_message=f"Upload results and details of run {date_id}",
         )
 
-        results_dataset = Dataset.from_dict(
-            {key: [json.dumps(v, cls=EnhancedJSONEncoder, indent=2)] for key, v in results_dict.items()}
-        )
-        results_dataset.to_parquet(f"{fsspec_repo_uri}/{result_file_base_name}.parquet")
-
-        for task_name, dataset in details.items():
-            output_file_details = Path(date_id) / f"details_{task_name}_{date_id}.parquet"
-            dataset.to_parquet(f"{fsspec_repo_uri}/{output_file_details}")
-
-        self.recreate_metadata_card(repo_id)
+        self.recreate_metadata_card(repo_id, model_name=model_name)
 
-    def recreate_metadata_card(self, repo_id: str) -> None:  # noqa: C901
+    def recreate_metadata_card(self, repo_id: str, model_name: str | None = None) -> None:  # noqa: C901
         """Fully updates the details repository metadata card for the currently evaluated model
 
         Args:
             repo_id (str): Details dataset repository path on the hub (`org/dataset`)
+            model_name (str, optional): Name of the evaluated model, defaults to the one of the general config logger.
         """
+        if model_name is None:
+            model_name = self.general_config_logger.model_name
         # Add a nice dataset card and the configuration YAML
         files_in_repo = self.api.list_repo_files(repo_id=repo_id, repo_type="dataset")
         results_files = [f for f in files_in_repo if ".json" in f]
         parquet_files = [f for f in files_in_repo if ".parquet" in f]
 
-        details_file_regex = re.compile(r"details_(?P<task_name>.*?)_(?P<date>\d+-\d+-\d+T.*)\.parquet$")
         multiple_results = len(results_files) > 1
 
         # Get last eval results date for each task (evals might be non overlapping)
         last_eval_date_results = {}
+        # Files are parsed once here, and the same matches are used to build the configs below
+        details_path_matches = {}
         for sub_file in parquet_files:
-            # We focus on details only
-            if "results_" in sub_file:
-                continue
-
             # subfile have this general format:
             # `2023-09-03T10-57-04.203304/details_harness|hendrycksTest-us_foreign_policy|5_2023-09-03T10-57-04.203304.parquet`
             # in the iso date, the `:` are replaced by `-` because windows does not allow `:` in their filenames
-            task_name = (
-                details_file_regex.match(os.path.basename(sub_file)).group("task_name")  # type: ignore
-            )
+            # We focus on details only
+            details_path_match = DETAILS_PATH_REGEX.match(sub_file)
+            if not details_path_match:
+                if not RESULTS_FILE_REGEX.match(sub_file):
+                    hlog_warn(f"Skipping {sub_file} in {repo_id}, which is neither a results nor a details file")
+                continue
+            details_path_matches[sub_file] = details_path_match
+            task_name = details_path_match.group("task_name")
             # task_name is then equal to `leaderboard|mmlu:us_foreign_policy|5`
 
-            # to be able to parse the filename as iso dates, we need to re-replace the `-` with `:`
-            # iso_date[13] = iso_date[16] = ':'
-            dir_name = os.path.dirname(sub_file)
-            iso_date = ":".join(dir_name.rsplit("-", 2))
-            eval_date = datetime.fromisoformat(iso_date)
+            date_id = details_path_match.group("dir")
+            eval_date = (_parse_date_id(date_id), date_id)
 
             last_eval_date_results[task_name] = (
                 max(last_eval_date_results[task_name], eval_date) if task_name in last_eval_date_results else eval_date
             )
 
-        max_last_eval_date_results = list(last_eval_date_results.values())[0]
-        # Now we convert them in iso-format
-        for task in last_eval_date_results:
-            if max_last_eval_date_results < last_eval_date_results[task]:
-                max_last_eval_date_results = last_eval_date_results[task]
-            last_eval_date_results[task] = last_eval_date_results[task].isoformat()
-        max_last_eval_date_results = max_last_eval_date_results.isoformat()
+        max_last_eval_date, max_last_eval_date_results = max(last_eval_date_results.values())
+        # We keep the dates as written in the file names, older runs having no microseconds in them when those were 0
+        last_eval_date_results = {task: date_id for task, (_, date_id) in last_eval_date_results.items()}
 
         # Add the YAML for the configs
         card_metadata = MetadataConfigs()
+        # Position of each split in the data files of the special tasks configs
+        split_index_by_task: dict[str, dict[str, int]] = {}
 
         # Add the results config and add the result file as a parquet file
         for sub_file in parquet_files:
-            if "results_" in sub_file:
-                eval_date = os.path.basename(sub_file).replace("results_", "").replace(".parquet", "")
+            details_path_match = details_path_matches.get(sub_file)
+            results_file_match = RESULTS_FILE_REGEX.match(sub_file)
+            if details_path_match is not None:
+                task_name = details_path_match.group("task_name")
+                eval_date = details_path_match.group("dir")
+
+                sanitized_task = _sanitize_config_name(task_name)
+                sanitized_last_eval_date_results = _sanitize_split_name(last_eval_date_results[task_name])
+                repo_file_name = os.path.join("**", os.path.basename(sub_file))
+            elif results_file_match is not None:
+                eval_date = results_file_match.group("date")
                 sanitized_task = "results"
-                sanitized_last_eval_date_results = re.sub(r"[^\w\.]", "_", max_last_eval_date_results)
+                sanitized_last_eval_date_results = _sanitize_split_name(max_last_eval_date_results)
                 repo_file_name = os.path.basename(sub_file)
             else:
-                filename = os.path.basename(sub_file)
-
-                task_name_match = details_file_regex.match(filename)  # type: ignore
-                if not task_name_match:
-                    raise ValueError(f"Could not parse task name from filename: {filename}")
-                task_name = task_name_match.group("task_name")
-                eval_date = task_name_match.group("date")
-
-                sanitized_task = re.sub(r"\W", "_", task_name)
-                sanitized_last_eval_date_results = re.sub(r"[^\w\.]", "_", last_eval_date_results[task_name])
-                repo_file_name = os.path.join("**", os.path.basename(sub_file))
+                # Already reported above
+                continue
 
-            sanitized_eval_date = re.sub(r"[^\w\.]", "_", eval_date)
+            sanitized_eval_date = _sanitize_split_name(eval_date)
 
             if multiple_results:
-                if sanitized_task not in card_metadata:
-                    card_metadata[sanitized_task] = {
-                        "data_files": [{"split": sanitized_eval_date, "path": [repo_file_name]}]
-                    }
-                else:
-                    former_entry = card_metadata[sanitized_task]
-                    card_metadata[sanitized_task] = {
-                        "data_files": former_entry["data_files"]
-                        + [{"split": sanitized_eval_date, "path": [repo_file_name]}]
-                    }
+                card_metadata.setdefault(sanitized_task, {"data_files": []})["data_files"].append(
+                    {"split": sanitized_eval_date, "path": [repo_file_name]}
+                )
             else:
                 if sanitized_task in card_metadata:
                     raise ValueError(
-                        f"Entry for {sanitized_task} already exists in {former_entry} for repo {repo_id} and file {sub_file}"
+                        f"Entry for {sanitized_task} already exists in {card_metadata[sanitized_task]} for repo {repo_id} and file {sub_file}"
                     )
                 card_metadata[sanitized_task] = {
                     "data_files": [{"split": sanitized_eval_date, "path": [repo_file_name]}]
                 }
 
             if sanitized_eval_date == sanitized_last_eval_date_results:
-                all_entry = card_metadata[sanitized_task]["data_files"]
-                card_metadata[sanitized_task] = {
-                    "data_files": all_entry + [{"split": "latest", "path": [repo_file_name]}]
-                }
+                card_metadata[sanitized_task]["data_files"].append({"split": "latest", "path": [repo_file_name]})
 
-            if "results_" in sub_file:
+            if details_path_match is None:
                 continue
 
             # Special case for MMLU with a single split covering it all
             # We add another config with all MMLU splits results together for easy inspection
-            SPECIAL_TASKS = [
-                "lighteval|mmlu",
-                "original|mmlu",
-            ]
             for special_task in SPECIAL_TASKS:
-                sanitized_special_task = re.sub(r"\W", "_", special_task)
+                sanitized_special_task = _sanitize_config_name(special_task)
                 if sanitized_special_task in sanitized_task:
                     task_info = task_name.split("|")
                     # We have few-shot infos, let's keep them in our special task name
@@ -389,53 +567,35 @@ class EvaluationTracker:
                         sanitized_special_task += f"_{task_info[-1]}"
                     elif len(task_info) == 4:
                         sanitized_special_task += f"_{task_info[-2]}_{task_info[-1]}"
-                    if sanitized_special_task not in card_metadata:
-                        card_metadata[sanitized_special_task] = {
-                            "data_files": [{"split": sanitized_eval_date, "path": [repo_file_name]}]
+
+                    data_files = card_metadata.setdefault(sanitized_special_task, {"data_files": []})["data_files"]
+                    if sanitized_special_task not in split_index_by_task:
+                        split_index_by_task[sanitized_special_task] = {
+                            entry["split"]: index for index, entry in enumerate(data_files)
                         }
-                    else:
-                        former_entry = card_metadata[sanitized_special_task]["data_files"]
-                        # Any entry for this split already?
-                        try:
-                            split_index = next(
-                                index
-                                for index, dictionary in enumerate(former_entry)
-                                if dictionary.get("split", None) == sanitized_eval_date
-                            )
-                        except StopIteration:
-                            split_index = None
-                        if split_index is None:
-                            card_metadata[sanitized_special_task] = {
-                                "data_files": former_entry + [{"split": sanitized_eval_date, "path": [repo_file_name]}]
-                            }
-                        else:
-                            former_entry[split_index]["path"] += [repo_file_name]
-                            card_metadata[sanitized_special_task] = {"data_files": former_entry}
+                    split_index = split_index_by_task[sanitized_special_task]
 
+                    splits = [sanitized_eval_date]
                     if sanitized_eval_date == sanitized_last_eval_date_results:
-                        former_entry = card_metadata[sanitized_special_task]["data_files"]
-                        try:
-                            split_index = next(
-                                index
-                                for index, dictionary in enumerate(former_entry)
-                                if dictionary.get("split", None) == "latest"
-                            )
-                        except StopIteration:
-                            split_index = None
-                        if split_index is None:
-                            card_metadata[sanitized_special_task] = {
-                                "data_files": former_entry + [{"split": "latest", "path": [repo_file_name]}]
-                            }
+                        splits.append("latest")
+                    for split in splits:
+                        # Any entry for this split already?
+                        if split in split_index:
+                            data_files[split_index[split]]["path"].append(repo_file_name)
                         else:
-                            former_entry[split_index]["path"] += [repo_file_name]
-                            card_metadata[sanitized_special_task] = {"data_files": former_entry}
+                            split_index[split] = len(data_files)
+                            data_files.append({"split": split, "path": [repo_file_name]})
 
         # Cleanup a little the dataset card
         # Get the top results
-        last_results_file = [f for f in results_files if max_last_eval_date_results.replace(":", "-") in f][0]
+        last_results_file = [f for f in results_files if max_last_eval_date_results in f][0]
         last_results_file_path = hf_hub_url(repo_id=repo_id, filename=last_results_file, repo_type="dataset")
-        f: Dataset = load_dataset("json", data_files=last_results_file_path, split="train")  # type: ignore
-        results_dict = f["results"][0]
+        last_results_local_path = self.api.hf_hub_download(
+            repo_id=repo_id, filename=last_results_file, repo_type="dataset"
+        )
+        # Results files written by older versions with the json module can hold NaN values, which orjson rejects
+        with open(last_results_local_path, "r") as f:
+            results_dict = json.load(f)["results"]
         new_dictionary = {"all": results_dict}
         new_dictionary.update(results_dict)
         results_string = json.dumps(new_dictionary, indent=4)
@@ -455,7 +615,7 @@ class EvaluationTracker:
 
         card_data = DatasetCardData(
             dataset_summary=f"Dataset automatically created during the evaluation run of model "
-            f"[{self.general_config_logger.model_name}](https://huggingface.co/{self.general_config_logger.model_name})"
+            f"[{model_name}](https://huggingface.co/{model_name})"
             f"{org_string}.\n\n"
             f"The dataset is composed of {len(card_metadata) - 1} configuration, each one coresponding to one of the evaluated task.\n\n"
             f"The dataset has been created from {len(results_files)} run(s). Each run can be found as a specific split in each "
@@ -464,12 +624,12 @@ class EvaluationTracker:
             f"To load the details from a run, you can for instance do the following:\n"
             f'```python\nfrom datasets import load_dataset\ndata = load_dataset("{repo_id}",\n\t"{sanitized_task}",\n\tsplit="train")\n```\n\n'
             f"## Latest results\n\n"
-            f'These are the [latest results from run {max_last_eval_date_results}]({last_results_file_path.replace("/resolve/", "/blob/")})'
+            f'These are the [latest results from run {max_last_eval_date.isoformat()}]({last_results_file_path.replace("/resolve/", "/blob/")})'
             f"(note that their might be results for other tasks in the repos if successive evals didn't cover the same tasks. "
             f'You find each in the results and the "latest" split for each eval):\n\n'
             f"```python\n{results_string}\n```",
-            repo_url=f"https://huggingface.co/{self.general_config_logger.model_name}",
-            pretty_name=f"Evaluation run of {self.general_config_logger.model_name}",
+            repo_url=f"https://huggingface.co/{model_name}",
+            pretty_name=f"Evaluation run of {model_name}",
             leaderboard_url=leaderboard_url,
             point_of_contact=point_of_contact,
         )
@@ -482,7 +642,11 @@ class EvaluationTracker:
         card.push_to_hub(repo_id, repo_type="dataset")
 
     def push_to_tensorboard(  # noqa: C901
-        self, results: dict[str, dict[str, float]], details: dict[str, DetailsLogger.CompiledDetail]
+        self,
+        results: dict[str, dict[str, float]],
+        details: dict[str, DetailsLogger.CompiledDetail],
+        global_step: int,
+        run: str,
     ):
         if not is_tensorboardX_available:
             hlog_warn(NO_TENSORBOARDX_WARN_MSG)
@@ -494,13 +658,6 @@ class EvaluationTracker:
 
         prefix = self.tensorboard_metric_prefix
 
-        if self.nanotron_run_info is not None:
-            global_step = self.nanotron_run_info.step
-            run = f"{self.nanotron_run_info.run}_{prefix}"
-        else:
-            global_step = 0
-            run = prefix
-
         output_dir_tb = Path(self.output_dir) / "tb" / run
         output_dir_tb.mkdir(parents=True, exist_ok=True)
 
@@ -511,7 +668,7 @@ class EvaluationTracker:
             path_in_repo="tb",
             commit_every=6000,  # Very long time so that we can change our files names and trigger push ourselves (see below)
         )
-        bench_averages = {}
+        bench_averages = defaultdict(lambda: defaultdict(list))
         for name, values in results.items():
             splited_name = name.split("|")
             if len(splited_name) == 3:
@@ -522,17 +679,13 @@ class EvaluationTracker:
             if ":" in task_name:
                 bench_suite = task_name.split(":")[0]  # e.g. MMLU
                 hlog(f"bench_suite {bench_suite} in {task_name}")
-                for metric, value in values.items():
-                    if "stderr" in metric:
-                        continue
-                    if bench_suite not in bench_averages:
-                        bench_averages[bench_suite] = {}
-                    bench_averages[bench_suite][metric] = bench_averages[bench_suite].get(metric, []) + [float(value)]
             hlog(f"Pushing {task_name} {values} to tensorboard")
+            # A single pass both pushes the task metrics and collects them for the bench suite averages
             for metric, value in values.items():
                 if "stderr" in metric:
                     tb_context.add_scalar(f"stderr_{prefix}/{task_name}/{metric}", value, global_step=global_step)
                 elif bench_suite is not None:
+                    bench_averages[bench_suite][metric].append(float(value))
                     tb_context.add_scalar(
                         f"{prefix}_{bench_suite}/{task_name}/{metric}", value, global_step=global_step
                     )
@@ -544,7 +697,7 @@ class EvaluationTracker:
                 hlog(f"Pushing average {name} {metric} {sum(values) / len(values)} to tensorboard")
                 tb_context.add_scalar(f"{prefix}/{name}/{metric}", sum(values) / len(values), global_step=global_step)
 
-        tb_context.add_text("eval_config", obj_to_markdown(results), global_step=global_step)
+        tb_context.add_text("eval_config", _results_to_markdown(results), global_step=global_step)
 
         for task_name, task_details in details.items():
             tb_context.add_text(
@@ -560,9 +713,12 @@ class EvaluationTracker:
 
         # tb_context.close()  # flushes the unfinished write operations
         time.sleep(5)
-        files = os.listdir(output_dir_tb)
-        for file in files:
-            os.rename(os.path.join(output_dir_tb, file), os.path.join(output_dir_tb, f"{global_step:07d}_{file}"))
+        step_prefix = f"{global_step:07d}_"
+        # We snapshot the entries first, so that renamed files can't show up again in the directory iteration
+        with os.scandir(output_dir_tb) as it:
+            entries = list(it)
+        for entry in entries:
+            os.rename(entry.path, output_dir_tb / f"{step_prefix}{entry.name}")
 
         # Now we can push to the hub
         tb_context.scheduler.trigger()
@@ -53,6 +53,7 @@ def main(args):
         push_to_tensorboard=args.push_to_tensorboard,
         public=args.public_run,
         hub_results_org=args.results_org,
+        push_in_background=args.push_in_background,
     )
     pipeline_params = PipelineParameters(
         launcher_type=ParallelismManager.ACCELERATE,
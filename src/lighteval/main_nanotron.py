@@ -75,6 +75,7 @@ def main(
         save_details=lighteval_config.logging.save_details,
         tensorboard_metric_prefix=lighteval_config.logging.tensorboard_metric_prefix,
         nanotron_run_info=nanotron_config.nanotron_config.general,
+        push_in_background=lighteval_config.logging.push_in_background,
     )
 
     pipeline_parameters = PipelineParameters(
@@ -66,6 +66,12 @@ def parser_accelerate(parser=None):
     parser.add_argument(
         "--public_run", default=False, action="store_true", help="Push results and details to a public repo"
     )
+    parser.add_argument(
+        "--push_in_background",
+        default=False,
+        action="store_true",
+        help="Push to the hub and to tensorboard in a background thread, without blocking the end of the evaluation",
+    )
     parser.add_argument(
         "--results_org",
         type=str,
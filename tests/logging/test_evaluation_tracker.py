@@ -23,12 +23,15 @@
 import json
 import os
 import tempfile
+import threading
 from datetime import datetime
 from pathlib import Path
+from types import SimpleNamespace
 
 import pytest
 from datasets import Dataset
-from huggingface_hub import HfApi
+from datasets.utils.metadata import MetadataConfigs
+from huggingface_hub import DatasetCard, HfApi
 
 from lighteval.logging.evaluation_tracker import EvaluationTracker
 from lighteval.logging.info_loggers import DetailsLogger
@@ -50,6 +53,7 @@ def mock_evaluation_tracker(request):
             "push_to_hub": passed_params.get("push_to_hub", False),
             "push_to_tensorboard": passed_params.get("push_to_tensorboard", False),
             "hub_results_org": passed_params.get("hub_results_org", ""),
+            "push_in_background": passed_params.get("push_in_background", False),
         }
         tracker = EvaluationTracker(**kwargs)
         tracker.general_config_logger.model_name = "test_model"
@@ -69,6 +73,10 @@ def mock_datetime(monkeypatch):
         def fromisoformat(cls, date_string: str):
             return mock_date
 
+        @classmethod
+        def strptime(cls, date_string: str, format: str):
+            return mock_date
+
     monkeypatch.setattr("lighteval.logging.evaluation_tracker.datetime", MockDatetime)
     return mock_date
 
@@ -106,7 +114,7 @@ def test_details_logging(mock_evaluation_tracker, mock_datetime):
 
     mock_evaluation_tracker.save()
 
-    date_id = mock_datetime.isoformat().replace(":", "-")
+    date_id = mock_datetime.strftime("%Y-%m-%dT%H-%M-%S.%f")
     details_dir = Path(mock_evaluation_tracker.output_dir) / "details" / "test_model" / date_id
     assert details_dir.exists()
 
@@ -126,6 +134,77 @@ def test_no_details_output(mock_evaluation_tracker: EvaluationTracker):
     assert not details_dir.exists()
 
 
+@pytest.mark.evaluation_tracker(push_to_hub=True, hub_results_org="test_org", push_in_background=True)
+def test_push_to_hub_in_background(mock_evaluation_tracker: EvaluationTracker, monkeypatch):
+    push_started = threading.Event()
+    release_push = threading.Event()
+    pushed = []
+
+    def blocking_push_to_hub(**kwargs):
+        push_started.set()
+        release_push.wait(timeout=10)
+        pushed.append(kwargs)
+
+    monkeypatch.setattr(mock_evaluation_tracker, "push_to_hub", blocking_push_to_hub)
+    mock_evaluation_tracker.metrics_logger.metric_aggregated = {"task1": {"accuracy": 0.8}}
+
+    # save returns while the push is still running
+    mock_evaluation_tracker.save()
+    assert push_started.wait(timeout=10)
+    assert pushed == []
+
+    # The push works on a snapshot, later changes to the loggers don't leak in
+    mock_evaluation_tracker.metrics_logger.metric_aggregated["task2"] = {"accuracy": 0.5}
+    release_push.set()
+    mock_evaluation_tracker.wait_for_uploads()
+
+    assert len(pushed) == 1
+    assert pushed[0]["repo_id"] == "test_org/details_test_model_private"
+    assert json.loads(pushed[0]["results_json"])["results"] == {"task1": {"accuracy": 0.8}}
+    mock_evaluation_tracker.close()
+
+
+@pytest.mark.evaluation_tracker(push_to_hub=True, hub_results_org="test_org", push_in_background=True)
+def test_push_to_hub_in_background_errors(mock_evaluation_tracker: EvaluationTracker, monkeypatch):
+    def failing_push_to_hub(**kwargs):
+        raise RuntimeError("Push failed")
+
+    monkeypatch.setattr(mock_evaluation_tracker, "push_to_hub", failing_push_to_hub)
+
+    mock_evaluation_tracker.save()
+
+    with pytest.raises(RuntimeError, match="Push failed"):
+        mock_evaluation_tracker.wait_for_uploads()
+    mock_evaluation_tracker.close()
+
+
+@pytest.mark.evaluation_tracker(push_to_tensorboard=True, hub_results_org="test_org", push_in_background=True)
+def test_push_to_tensorboard_in_background(mock_evaluation_tracker: EvaluationTracker, monkeypatch):
+    release_push = threading.Event()
+    pushed = []
+
+    def blocking_push_to_tensorboard(**kwargs):
+        release_push.wait(timeout=10)
+        pushed.append(kwargs)
+
+    monkeypatch.setattr(mock_evaluation_tracker, "push_to_tensorboard", blocking_push_to_tensorboard)
+    mock_evaluation_tracker.nanotron_run_info = SimpleNamespace(step=10, run="test_run")
+    mock_evaluation_tracker.metrics_logger.metric_aggregated = {"task1": {"accuracy": 0.8}}
+
+    mock_evaluation_tracker.save()
+
+    # The training moves on while the push is still running
+    mock_evaluation_tracker.nanotron_run_info.step = 20
+    mock_evaluation_tracker.metrics_logger.metric_aggregated["task1"]["accuracy"] = 0.5
+    release_push.set()
+    mock_evaluation_tracker.close()
+
+    assert len(pushed) == 1
+    assert pushed[0]["global_step"] == 10
+    assert pushed[0]["run"] == "test_run_eval"
+    assert pushed[0]["results"] == {"task1": {"accuracy": 0.8}}
+
+
 @pytest.mark.skipif(
     reason="Secrets are not available in this environment",
     condition=os.getenv("HF_TEST_TOKEN") is None,
@@ -167,3 +246,114 @@ def test_push_to_hub_works(testing_empty_hf_org_id, mock_evaluation_tracker: Eva
     # Check that the details dataset was uploaded
     details_files = [file for file in repo_files if "details_" in file and file.endswith(".parquet")]
     assert len(details_files) == 2
+
+
+def _recreate_metadata_card(tracker: EvaluationTracker, monkeypatch, tmp_path, repo_files, last_results: bytes):
+    """Rebuilds the metadata card of a stubbed details repository, and returns its configs and the card."""
+    last_results_path = tmp_path / "last_results.json"
+    last_results_path.write_bytes(last_results)
+    monkeypatch.setattr(tracker.api, "list_repo_files", lambda **kwargs: repo_files)
+    monkeypatch.setattr(tracker.api, "hf_hub_download", lambda **kwargs: str(last_results_path))
+
+    pushed = {}
+    original_to_dataset_card_data = MetadataConfigs.to_dataset_card_data
+
+    def to_dataset_card_data(self, dataset_card_data):
+        pushed["card_metadata"] = dict(self)
+        return original_to_dataset_card_data(self, dataset_card_data)
+
+    def push_to_hub(self, repo_id, **kwargs):
+        pushed["card"] = self
+
+    monkeypatch.setattr(MetadataConfigs, "to_dataset_card_data", to_dataset_card_data)
+    monkeypatch.setattr(DatasetCard, "push_to_hub", push_to_hub)
+
+    tracker.recreate_metadata_card("test_org/details_test_model_private")
+    return pushed["card_metadata"], pushed["card"]
+
+
+def test_recreate_metadata_card(mock_evaluation_tracker: EvaluationTracker, monkeypatch, tmp_path):
+    first_run, second_run = "2023-01-01T12-00-00.123456", "2023-01-02T12-00-00"
+    mmlu_files = [
+        f"details_lighteval|mmlu:abstract_algebra|5_{first_run}.parquet",
+        f"details_lighteval|mmlu:anatomy|5_{first_run}.parquet",
+    ]
+    repo_files = [
+        "README.md",
+        f"results_{first_run}.json",
+        f"results_{first_run}.parquet",
+        # Older runs have no microseconds in their date ids when those were 0
+        f"results_{second_run}.json",
+        f"results_{second_run}.parquet",
+        *[f"{first_run}/{file}" for file in mmlu_files],
+        f"{first_run}/details_lighteval|task1|0_{first_run}.parquet",
+        f"{second_run}/details_lighteval|task1|0_{second_run}.parquet",
+        # Neither a results nor a details file, skipped
+        "stray.parquet",
+    ]
+
+    card_metadata, card = _recreate_metadata_card(
+        mock_evaluation_tracker,
+        monkeypatch,
+        tmp_path,
+        repo_files,
+        json.dumps({"results": {"task1": {"accuracy": 0.8}}}).encode(),
+    )
+
+    first_split, second_split = "2023_01_01T12_00_00.123456", "2023_01_02T12_00_00"
+    assert card_metadata == {
+        "results": {
+            "data_files": [
+                {"split": first_split, "path": [f"results_{first_run}.parquet"]},
+                {"split": second_split, "path": [f"results_{second_run}.parquet"]},
+                {"split": "latest", "path": [f"results_{second_run}.parquet"]},
+            ]
+        },
+        "lighteval_mmlu_abstract_algebra_5": {
+            "data_files": [
+                {"split": first_split, "path": [f"**/{mmlu_files[0]}"]},
+                {"split": "latest", "path": [f"**/{mmlu_files[0]}"]},
+            ]
+        },
+        "lighteval_mmlu_anatomy_5": {
+            "data_files": [
+                {"split": first_split, "path": [f"**/{mmlu_files[1]}"]},
+                {"split": "latest", "path": [f"**/{mmlu_files[1]}"]},
+            ]
+        },
+        # All the MMLU subtasks together
+        "lighteval_mmlu_5": {
+            "data_files": [
+                {"split": first_split, "path": [f"**/{file}" for file in mmlu_files]},
+                {"split": "latest", "path": [f"**/{file}" for file in mmlu_files]},
+            ]
+        },
+        # The latest split of each task points to its own last run
+        "lighteval_task1_0": {
+            "data_files": [
+                {"split": first_split, "path": [f"**/details_lighteval|task1|0_{first_run}.parquet"]},
+                {"split": second_split, "path": [f"**/details_lighteval|task1|0_{second_run}.parquet"]},
+                {"split": "latest", "path": [f"**/details_lighteval|task1|0_{second_run}.parquet"]},
+            ]
+        },
+    }
+    assert "latest results from run 2023-01-02T12:00:00" in card.text
+    assert '"accuracy": 0.8' in card.text
+
+
+def test_recreate_metadata_card_legacy_results(mock_evaluation_tracker: EvaluationTracker, monkeypatch, tmp_path):
+    date_id = "2023-01-01T12-00-00"
+    repo_files = [
+        f"results_{date_id}.json",
+        f"results_{date_id}.parquet",
+        f"{date_id}/details_lighteval|task1|0_{date_id}.parquet",
+    ]
+    # Results files written with the json module hold NaN for undefined stderrs
+    legacy_results = b'{"results": {"task1": {"accuracy": 0.8, "accuracy_stderr": NaN}}}'
+
+    card_metadata, card = _recreate_metadata_card(
+        mock_evaluation_tracker, monkeypatch, tmp_path, repo_files, legacy_results
+    )
+
+    assert set(card_metadata) == {"results", "lighteval_task1_0"}
+    assert '"accuracy_stderr": NaN' in card.text